@@ -9,19 +9,20 @@
 #******************************************************************************
 
 import os
-import tomllib
+import re
+import pickle
 import fnmatch
+import hashlib
 from pathlib import Path
-
-from rich import print
-from rich.console import Console
-from rich.theme import Theme
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 
 import chain.message
 from chain.config import ConfigFinder, ConfigLoader
 from chain.message import *
 from chain.errors import *
 from chain import utils
+from chain import paths
 
 
 #==============================================================================
@@ -31,6 +32,19 @@ class BuildEnv:
     init_console_tag = 'INIT/CONSOLE'
     init_tools_tag = 'INIT/TOOLS'
     init_flows_tag = 'INIT/FLOWS'
+    init_cache_tag = 'INIT/CACHE'
+
+    # version of the cached environment format, it should be increased
+    # on changes of the cached classes
+    env_cache_version = 2
+
+    # values of environment variables treated as true
+    true_values = ('true', 't', 'yes', '1')
+
+    # console options: (command-line option, environment variable)
+    console_force_opts = (
+        ('force_terminal', 'CHAIN_FORCE_TERMINAL'),
+        ('force_interactive', 'CHAIN_FORCE_INTERACTIVE'))
 
     #--------------------------------------------------------------------------
     def __init__(self, root_path, args):
@@ -43,6 +57,9 @@ class BuildEnv:
         message._debug = self.__args['debug']
         message._quiet = self.__args['quiet']
 
+        # environment variables are read once for the whole initialization
+        self.__env = dict(os.environ)
+
         self.__init_config_finder()
         self.__init_console()
         self.__load_tools_config()
@@ -87,11 +104,12 @@ class BuildEnv:
 
     #--------------------------------------------------------------------------
     def __init_config_finder(self):
-        config_finder = ConfigFinder()
+        config_finder = ConfigFinder(env=self.__env)
 
-        xdg_config_path = os.environ.get('XDG_CONFIG_HOME')
-        user_home_path = os.environ.get('HOME')
-        subdir = os.environ.get('CHAIN_CONFIG_DIR_NAME', 'chain')
+        env = self.__env
+        xdg_config_path = env.get('XDG_CONFIG_HOME')
+        user_home_path = env.get('HOME')
+        subdir = env.get('CHAIN_CONFIG_DIR_NAME', 'chain')
 
         config_finder.append_path(
             'project root', self.__args['project_root'], is_dir=True)
@@ -118,6 +136,10 @@ class BuildEnv:
 
     #--------------------------------------------------------------------------
     def __init_console(self):
+        # rich is heavy to import, it's needed here only
+        from rich.console import Console
+        from rich.theme import Theme
+
         self.config_finder.set_file_name('theme.toml')
         self.config_finder.stop_on_first(True)
         self.config_finder.prepend_arg_opt(
@@ -135,12 +157,14 @@ class BuildEnv:
             theme = Theme(ConfigLoader(config_file).load()['styles'])
 
         except ConfigFinderError as e:
-            self.__raise_finder_error(
-                'console theme', self.init_console_tag, e)
+            utils.warn(
+                self.__finder_error_msg('console theme', e),
+                self.init_console_tag)
 
         except ConfigLoaderError as e:
-            self.__raise_loader_error(
-                'console theme', self.init_console_tag, e)
+            utils.warn(
+                self.__loader_error_msg('console theme', e),
+                self.init_console_tag)
 
         except KeyError:
             print_warning(
@@ -154,20 +178,15 @@ class BuildEnv:
         #
 
         force_args = dict()
-        force_terminal = self.__args.get('force_terminal')
-        force_interactive = self.__args.get('force_interactive')
 
-        if force_terminal is None:
-            force_terminal = os.environ.get('CHAIN_FORCE_TERMINAL')
+        for name, env_var in self.console_force_opts:
+            value = self.__args.get(name)
 
-        if force_interactive is None:
-            force_interactive = os.environ.get('CHAIN_FORCE_INTERACTIVE')
+            if value is None:
+                value = self.__env.get(env_var)
 
-        if force_terminal is not None:
-            force_args['force_terminal'] = bool(int(force_terminal))
-
-        if force_interactive is not None:
-            force_args['force_interactive'] = bool(int(force_interactive))
+            if value is not None:
+                force_args[name] = bool(int(value))
 
         self.console = Console(theme = theme, **force_args)
         message._console = self.console
@@ -212,13 +231,13 @@ class BuildEnv:
             self.__tools_config_path = config_file
 
         except ConfigFinderError as e:
-            self.__raise_finder_error(
-                'tools', self.init_tools_tag, e,
+            utils.fail(
+                self.__finder_error_msg('tools', e), self.init_tools_tag,
                 ConfigError(ConfigError.Kind.FINDING_ERROR))
 
         except ConfigLoaderError as e:
-            self.__raise_loader_error(
-                'tools', self.init_tools_tag, e,
+            utils.fail(
+                self.__loader_error_msg('tools', e), self.init_tools_tag,
                 ConfigError(ConfigError.Kind.LOADING_ERROR, path=config_file))
 
         except KeyError:
@@ -267,30 +286,51 @@ class BuildEnv:
         if single_config:
             config_files = [config_files]
 
+        #------------------------------------------------------------
+        # using the cached environment (if it's enabled)
+        #
+
+        cache_path = self.__env_cache_path(config_files)
+
+        if cache_path is not None and self.__load_env_cache(cache_path):
+            return
+
         all_flows = dict()
+        norm_paths = dict()
 
         #------------------------------------------------------------
         # loading the config file(s)
         #
 
         try:
-            for path in config_files:
-                config_dict = ConfigLoader(path).load()
-                file_flows = config_dict.get('flow')
+            if len(config_files) == 1:
+                # a single file is loaded without starting of threads
+                path = config_files[0]
+                self.__merge_flows_file(
+                    all_flows, path, ConfigLoader(path).load(), norm_paths)
 
-                if file_flows is None:
-                    continue
+            else:
+                # files are loaded concurrently, but merged in the order
+                # of priority
+                workers = min(8, len(config_files))
 
-                self.__merge_flows_params(all_flows, file_flows, path.parent)
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    loading = [
+                        executor.submit(ConfigLoader(path).load)
+                        for path in config_files]
+
+                    for path, future in zip(config_files, loading):
+                        self.__merge_flows_file(
+                            all_flows, path, future.result(), norm_paths)
 
         except ConfigFinderError as e:
-            self.__raise_finder_error(
-                'flows', self.init_flows_tag, e,
+            utils.fail(
+                self.__finder_error_msg('flows', e), self.init_flows_tag,
                 ConfigError(ConfigError.Kind.FINDING_ERROR))
 
         except ConfigLoaderError as e:
-            self.__raise_loader_error(
-                'flows', self.init_flows_tag, e,
+            utils.fail(
+                self.__loader_error_msg('flows', e), self.init_flows_tag,
                 ConfigError(ConfigError.Kind.LOADING_ERROR, path=path))
 
         #------------------------------------------------------------
@@ -307,97 +347,222 @@ class BuildEnv:
 
         self.__check_flow(all_flows, self.__target_flow)
 
+        if cache_path is not None:
+            self.__save_env_cache(cache_path)
+
     #--------------------------------------------------------------------------
-    def __merge_flows_params(self, all_flows, file_flows, current_path):
-        for name in file_flows:
-            if not name in all_flows:
-                all_flows[name] = file_flows[name]
-                params = all_flows[name]
+    def __env_cache_path(self, flows_config_files):
+        '''Returns path to the cached environment or None if it's disabled
 
-                if 'path' in params:
-                    params['path'] = utils.normalize_path(
-                        current_path, params['path'])
+        The cache file name is a hash of the cache format version, the target
+        flow and the used tools and flows configuration files (paths,
+        modification times and sizes).
+        '''
+        env = self.__env
+        enabled = env.get('CHAIN_ENV_CACHE')
 
-                print_debug(
-                    f"New flow '{name}' is found in the file '{current_path}' "
-                    f"with parameters: {params}", 'CONFIG')
-            else:
-                new_params = file_flows[name]
-                existing_params = all_flows[name]
+        if enabled is None or enabled.strip().lower() not in self.true_values:
+            return None
+
+        cache_home = env.get('XDG_CACHE_HOME')
+        user_home = env.get('HOME')
+
+        if cache_home is not None:
+            cache_dir = Path(cache_home) / 'chain'
+        elif user_home is not None:
+            cache_dir = Path(user_home) / '.cache' / 'chain'
+        else:
+            return None
+
+        key = hashlib.blake2b(digest_size=16)
+        key.update(
+            f'{self.env_cache_version}\0{self.__target_flow}'.encode())
+
+        for path in [self.__tools_config_path, *flows_config_files]:
+            st = os.stat(path)
+            key.update(f'\0{path}\0{st.st_mtime_ns}\0{st.st_size}'.encode())
+
+        return cache_dir / f'env-{key.hexdigest()}.pkl'
+
+    #--------------------------------------------------------------------------
+    def __load_env_cache(self, cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                flows, tools = pickle.load(f)
+
+        except FileNotFoundError:
+            return False
+
+        except Exception as e:
+            print_warning(
+                f"Cached build environment can't be loaded from the file "
+                f"'{cache_path}': {e}", self.init_cache_tag)
+            return False
+
+        if (not isinstance(flows, BuildFlows)
+                or not isinstance(tools, BuildTools)):
+            print_warning(
+                f"Cached build environment in the file '{cache_path}' "
+                f"has unexpected contents", self.init_cache_tag)
+            return False
+
+        self.__flows = flows
+        self.__tools = tools
+
+        print_info(
+            f'Build environment is loaded from the cache: {cache_path}',
+            self.init_cache_tag)
+
+        return True
+
+    #--------------------------------------------------------------------------
+    def __save_env_cache(self, cache_path):
+        tmp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}')
+
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((self.__flows, self.__tools), f)
+
+            os.replace(tmp_path, cache_path)
+
+        except Exception as e:
+            print_warning(
+                f"Build environment can't be cached to the file "
+                f"'{cache_path}': {e}", self.init_cache_tag)
+
+    #--------------------------------------------------------------------------
+    def __merge_flows_file(self, all_flows, path, data, norm_paths):
+        file_flows = data.get('flow')
+
+        if file_flows is None:
+            return
+
+        # paths in the file are relative to its real location
+        self.__merge_flows_params(
+            all_flows, file_flows, Path(paths.realpath(path)).parent,
+            norm_paths)
+
+    #--------------------------------------------------------------------------
+    def __merge_flows_params(
+            self, all_flows, file_flows, current_path, norm_paths):
+
+        def normalize(path):
+            key = (current_path, path)
+            norm_path = norm_paths.get(key)
+
+            if norm_path is None:
+                norm_path = utils.normalize_path(current_path, path)
+                norm_paths[key] = norm_path
+
+            return norm_path
 
-                for key in new_params:
+        for name, new_params in file_flows.items():
+            existing_params = all_flows.get(name)
+
+            if existing_params is None:
+                all_flows[name] = new_params
+
+                if 'path' in new_params:
+                    new_params['path'] = normalize(new_params['path'])
+
+                if is_debug():
+                    print_debug(
+                        f"New flow '{name}' is found in the file "
+                        f"'{current_path}' with parameters: {new_params}",
+                        'CONFIG')
+            else:
+                for key, value in new_params.items():
                     if key in existing_params:
                         continue
 
                     if key == 'path':
-                        existing_params['path'] = utils.normalize_path(
-                            current_path, new_params['path'])
+                        existing_params['path'] = normalize(value)
                     else:
-                        existing_params[key] = new_params[key]
+                        existing_params[key] = value
 
-                    print_debug(
-                        f"Add parameter '{key} = {new_params[key]}' "
-                        f"to the flow '{name}' from file: {current_path}",
-                        'CONFIG')
+                    if is_debug():
+                        print_debug(
+                            f"Add parameter '{key} = {value}' "
+                            f"to the flow '{name}' from file: {current_path}",
+                            'CONFIG')
 
     #--------------------------------------------------------------------------
     def __check_flow(self, all_flows, name):
-        try:
-            flow_params = all_flows[name]
-            print_debug(f"Used flow '{name}': {flow_params}", 'ENV')
-        except KeyError:
-            print_error(
-                f"Configuration for the flow '{name}' was not found",
-                self.init_flows_tag)
-            raise ConfigError(
-                ConfigError.Kind.NO_ENTITY_DATA, entry=f'flow.{name}')
+        flows = self.__flows
+        stack = [name]
 
-        #------------------------------------------------------------
-        # checking the 'path' parameter
-        #
+        while len(stack) != 0:
+            name = stack.pop()
 
-        path = flow_params.get('path')
+            # the flow is added right away to be skipped if it's met again,
+            # its path is set after checking
+            if not flows.try_add(name, None):
+                continue
 
-        if path is None:
-            print_error(
-                f"Required configuration key 'path' was not found for "
-                f"the flow '{name}'", self.init_flows_tag)
-            raise ConfigError(
-                ConfigError.Kind.NO_CONFIG_PARAM, param='path',
-                entry=f'flow.{name}')
+            flow_params = all_flows.get(name)
 
-        if not path.exists():
-            print_error(
-                f"Path to a SCons tools for the flow '{name}' "
-                f"does not exist: {path}",
-                self.init_flows_tag)
-            raise PathError(path, PathError.Kind.NOT_EXIST)
+            if flow_params is None:
+                print_error(
+                    f"Configuration for the flow '{name}' was not found",
+                    self.init_flows_tag)
+                raise ConfigError(
+                    ConfigError.Kind.NO_ENTITY_DATA, entry=f'flow.{name}')
 
-        #------------------------------------------------------------
-        # processing configurations of required tools and
-        # flow dependencies
-        #
+            if is_debug():
+                print_debug(f"Used flow '{name}': {flow_params}", 'ENV')
+
+            #------------------------------------------------------------
+            # checking the 'path' parameter
+            #
+
+            path = flow_params.get('path')
+
+            if path is None:
+                print_error(
+                    f"Required configuration key 'path' was not found for "
+                    f"the flow '{name}'", self.init_flows_tag)
+                raise ConfigError(
+                    ConfigError.Kind.NO_CONFIG_PARAM, param='path',
+                    entry=f'flow.{name}')
+
+            if not path.exists():
+                print_error(
+                    f"Path to a SCons tools for the flow '{name}' "
+                    f"does not exist: {path}",
+                    self.init_flows_tag)
+                raise PathError(path, PathError.Kind.NOT_EXIST)
 
-        self.__flows.add(name, path)
+            #------------------------------------------------------------
+            # processing configurations of required tools and
+            # flow dependencies
+            #
 
-        if 'tools' in flow_params:
-            self.__update_tools(name, flow_params['tools'])
+            flows.set_path(name, path)
 
-        if 'flows' in flow_params:
-            for flow in flow_params['flows']:
-                if self.__flows.exists(flow):
-                    continue
-                self.__check_flow(all_flows, flow)
+            if 'tools' in flow_params:
+                self.__update_tools(name, flow_params['tools'])
+
+            # dependencies are pushed in reverse order to be processed
+            # in the order they are listed
+            stack.extend(reversed(flow_params.get('flows', [])))
 
     #--------------------------------------------------------------------------
     def __update_tools(self, flow_name, required_tools):
-        print_debug(
-            f"Required tools for the flow '{flow_name}': {required_tools}",
-            'ENV')
+        if is_debug():
+            print_debug(
+                f"Required tools for the flow '{flow_name}': "
+                f"{required_tools}", 'ENV')
+
+        tools_dict = self.__tools_dict
+        # paths in the file are relative to its real location
+        tools_base_path = Path(paths.realpath(self.__tools_config_path)).parent
+        add_tool = self.__tools.add
+        add_flow_tool = self.__flows.add_tool
 
-        for tool_name in required_tools:
-            required_versions = required_tools[tool_name]
-            tool_params = self.__tools_dict.get(tool_name)
+        for tool_name, required_versions in required_tools.items():
+            tool_params = tools_dict.get(tool_name)
 
             if type(required_versions) is not list:
                 required_versions = [required_versions]
@@ -454,12 +619,29 @@ class BuildEnv:
                     BuildEnvError.Kind.TOOL_VERSION,
                     tool=tool_name, version=required_versions)
 
+            location = tool_versions[tool_ver]
+
+            # the kind and the (non-empty) value after ':' are required
+            if type(location) is str:
+                where, _, loc = location.partition(':')
+            else:
+                where = loc = None
+
+            if where not in BuildTools.location_kinds or not loc:
+                print_error(
+                    f"Location of the version '{tool_ver}' of the tool "
+                    f"'{tool_name}' should be 'docker:<service>' or "
+                    f"'path:<path>': {location}",
+                    self.init_flows_tag)
+                raise ConfigError(
+                    ConfigError.Kind.NO_CONFIG_PARAM,
+                    param=f'versions.{tool_ver}', entry=f'tool.{tool_name}')
+
             #------------------------------------------------------------
             # normalize and check the tool's path
             #
 
-            path = utils.normalize_path(
-                self.__tools_config_path.parent, tool_path)
+            path = utils.normalize_path(tools_base_path, tool_path)
 
             if not path.exists():
                 print_error(
@@ -468,46 +650,78 @@ class BuildEnv:
                     self.init_flows_tag)
                 raise PathError(path, PathError.Kind.NOT_EXIST)
 
-            print_debug(
-                f"Selected version of the tool '{tool_name}' for the flow "
-                f"'{flow_name}' is '{tool_ver}'", 'ENV')
+            if is_debug():
+                print_debug(
+                    f"Selected version of the tool '{tool_name}' for the flow "
+                    f"'{flow_name}' is '{tool_ver}'", 'ENV')
 
             #------------------------------------------------------------
             # add tool to the environment and to the flow
             #
 
-            self.__tools.add(tool_name, tool_params, tool_ver)
-            self.__flows.add_tool(flow_name, tool_name, tool_ver)
+            add_tool(tool_name, path, tool_ver, location)
+            add_flow_tool(flow_name, tool_name, tool_ver)
 
     #--------------------------------------------------------------------------
     def __select_tool_version(self, required, available):
         for pat in required:
+            match = re.compile(fnmatch.translate(pat)).match
+
             for name in available:
-                if fnmatch.fnmatch(name, pat) is not None:
+                if match(name) is not None:
                     return name
 
         return None
 
     #--------------------------------------------------------------------------
-    def __raise_finder_error(
-            self, for_what, tag, catched_exception, raise_exception=None):
-        msg = (f"An error occurred while searching of the {for_what} "
-               f"configuration file in the {str(catched_exception.loc)}")
-        utils.wrong(msg, tag, raise_exception)
+    def __finder_error_msg(self, for_what, catched_exception):
+        return (f"An error occurred while searching of the {for_what} "
+                f"configuration file in the {str(catched_exception.loc)}")
 
     #--------------------------------------------------------------------------
-    def __raise_loader_error(
-            self, for_what, tag, catched_exception, raise_exception=None):
-        msg = (f"An error occurred while loading of the tools "
+    def __loader_error_msg(self, for_what, catched_exception):
+        return (f"An error occurred while loading of the {for_what} "
                 f"configuration due to {str(catched_exception)}")
-        utils.wrong(msg, tag, raise_exception)
+
+
+#==============================================================================
+@dataclass(slots=True)
+class ToolSpec:
+    '''Build tool: path to the SCons tool and used versions
+
+    The versions are added by BuildTools as they are required by flows.
+    '''
+
+    path: Path
+    versions: dict = field(default_factory=dict)
+
+
+#==============================================================================
+@dataclass(slots=True, frozen=True)
+class ToolInstance:
+    '''Used version of a build tool and its location
+
+    The location is a docker service name or a path, depending on 'where'
+    ('docker' or 'path').
+    '''
+
+    name: str
+    version: str
+    where: str
+    location: str
+    scons_path: Path
 
 
 #==============================================================================
 class BuildTools:
+    # kinds of tool locations: 'docker:<service>' or 'path:<path>'
+    location_kinds = ('docker', 'path')
+
     #--------------------------------------------------------------------------
     def __init__(self):
         self.__tools = dict()
+        self.__instances = dict()
+        self.__versions = None
 
     #--------------------------------------------------------------------------
     def __str__(self):
@@ -518,14 +732,24 @@ class BuildTools:
         return name in self.__tools
 
     #--------------------------------------------------------------------------
-    def add(self, name, params, version):
-        if not self.exists(name):
-            self.__tools[name] = params
-        else:
-            version_dict = self.__tools[name]['versions']
+    def add(self, name, path, version, location):
+        tool = self.__tools.get(name)
 
-            if not version in version_dict:
-                version_dict[version] = params['versions'][version]
+        if tool is None:
+            tool = ToolSpec(path)
+            self.__tools[name] = tool
+
+        version_dict = tool.versions
+
+        if not version in version_dict:
+            where, _, loc = location.partition(':')
+            instance = ToolInstance(name, version, where, loc, tool.path)
+
+            version_dict[version] = instance
+            self.__instances[(name, version)] = instance
+
+        # versions are changed, the cache is rebuilt on demand
+        self.__versions = None
 
     #--------------------------------------------------------------------------
     def names(self):
@@ -533,50 +757,44 @@ class BuildTools:
 
     #--------------------------------------------------------------------------
     def versions(self, name=None):
-        tool_versions = lambda nm: [v for v in self.__tools[nm]['versions']]
+        if self.__versions is None:
+            self.__versions = {
+                nm: tuple(tool.versions)
+                for nm, tool in self.__tools.items()}
 
         if name is None:
-            return {nm: tool_versions(nm) for nm in self.__tools}
+            return dict(self.__versions)
         else:
-            return tool_versions(name)
+            return self.__versions[name]
 
     #--------------------------------------------------------------------------
     def get_scons_tool_path(self, name):
-        return self.__tools[name]['path']
+        return self.__tools[name].path
+
+    #--------------------------------------------------------------------------
+    def get_instance(self, name, version):
+        return self.__instances[(name, version)]
 
     #--------------------------------------------------------------------------
     def get_location(self, name, version):
-        data = self.__tools[name]['versions'][version].split(':')
-        where = data[0]
-        loc = data[1]
-
-        if where == 'docker':
-            loc_key = 'service'
-        elif where == 'path':
-            loc_key = 'path'
-        else:
-            # TODO: error
-            pass
+        inst = self.__instances[(name, version)]
 
-        return {'where': where_tuple[0], loc_key: loc}
+        if inst.where == 'docker':
+            return {'where': inst.where, 'service': inst.location}
+        elif inst.where == 'path':
+            return {'where': inst.where, 'path': inst.location}
+        else:
+            return {'where': inst.where}
 
     #--------------------------------------------------------------------------
     def get_path(self, name, version):
-        loc = self.get_location(name, version)
-
-        if loc['where'] == 'docker':
-            return None
-        else:
-            return loc['path']
+        inst = self.__instances[(name, version)]
+        return inst.location if inst.where == 'path' else None
 
     #--------------------------------------------------------------------------
     def get_docker_service(self, name, version):
-        loc = self.get_location(name, version)
-
-        if loc['where'] == 'path':
-            return None
-        else:
-            return loc['service']
+        inst = self.__instances[(name, version)]
+        return inst.location if inst.where == 'docker' else None
 
     #--------------------------------------------------------------------------
     def check(self):
@@ -588,42 +806,81 @@ class BuildTools:
 class BuildFlows:
     #--------------------------------------------------------------------------
     def __init__(self, tools):
-        self.__flows = dict()
+        # flows are kept in parallel lists, indexed by the order of adding
+        self.__index = dict()
+        self.__names = list()
+        self.__paths = list()
+        self.__flow_tools = list()
+
+        # (tool name, version) -> indexes of flows using it
+        self.__tool_index = dict()
+
         self.__tools = tools
 
     #--------------------------------------------------------------------------
     def __str__(self):
-        return f'{self.__flows}'
+        flows = dict()
+
+        for name, path, tools in zip(
+                self.__names, self.__paths, self.__flow_tools):
+            flows[name] = {'path': path}
+
+            if len(tools) != 0:
+                flows[name]['tools'] = tools
+
+        return f'{flows}'
 
     #--------------------------------------------------------------------------
     def exists(self, name):
-        return name in self.__flows
+        return name in self.__index
 
     #--------------------------------------------------------------------------
     def add(self, name, path):
-        if not self.exists(name):
-            self.__flows[name] = {'path': path}
+        self.try_add(name, path)
 
     #--------------------------------------------------------------------------
-    def add_tool(self, flow_name, tool_name, tool_version):
-        flow = self.__flows[flow_name]
+    def try_add(self, name, path):
+        '''Adds the flow if it does not exist, returns True if it's added'''
+        n = len(self.__names)
+
+        if self.__index.setdefault(name, n) != n:
+            return False
 
-        if not 'tools' in flow:
-            flow['tools'] = dict()
+        self.__names.append(name)
+        self.__paths.append(path)
+        self.__flow_tools.append(dict())
 
-        tools = flow['tools']
+        return True
 
-        if tool_name in tools:
-            if tools[tool_name] == tool_version:
+    #--------------------------------------------------------------------------
+    def set_path(self, name, path):
+        self.__paths[self.__index[name]] = path
+
+    #--------------------------------------------------------------------------
+    def add_tool(self, flow_name, tool_name, tool_version):
+        n = self.__index[flow_name]
+        tools = self.__flow_tools[n]
+        version = tools.get(tool_name)
+
+        if version is not None:
+            if version == tool_version:
                 return
 
             # TODO: version conflict error
+            self.__tool_index[(tool_name, version)].remove(n)
 
         tools[tool_name] = tool_version
+        self.__tool_index.setdefault((tool_name, tool_version), []).append(n)
 
     #--------------------------------------------------------------------------
     def flows(self):
-        return list(self.__flows.keys())
+        return list(self.__names)
+
+    #--------------------------------------------------------------------------
+    def flows_using(self, tool_name, tool_version):
+        '''Returns names of flows which use the version of the tool'''
+        indexes = self.__tool_index.get((tool_name, tool_version), ())
+        return tuple(self.__names[n] for n in indexes)
 
     #--------------------------------------------------------------------------
     def tools(self):
@@ -631,7 +888,7 @@ class BuildFlows:
 
     #--------------------------------------------------------------------------
     def get_scons_tool_path(self, name):
-        return self.__flows[name]['path']
+        return self.__paths[self.__index[name]]
 
     #--------------------------------------------------------------------------
     def check(self):
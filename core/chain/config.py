@@ -9,25 +9,87 @@
 #******************************************************************************
 
 import os
-import sys
+import copy
+import stat
 import tomllib
+import threading
 from pathlib import Path
+from enum import IntEnum
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# faster (native) TOML parser, if it is installed
+try:
+    import rtoml
+except ImportError:
+    rtoml = None
 
-import chain
 from chain.message import *
 from chain.errors import *
+from chain import paths
+
+
+#******************************************************************************
+# Globals
+#
+
+# Parsed config files: (path, format, mtime_ns, size) -> data
+_parsed_cache = dict()
+
+_PathProbe = namedtuple('_PathProbe', ['exists', 'is_dir', 'is_file'])
+
+
+#******************************************************************************
+# Functions
+#
+
+#------------------------------------------------------------------------------
+def _probe(path):
+    '''Gets the kind of the path with a single stat() call'''
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        if not paths.is_missing_error(e):
+            raise
+
+        return _PathProbe(False, False, False)
+
+    return _PathProbe(
+        True, stat.S_ISDIR(st.st_mode), stat.S_ISREG(st.st_mode))
+
+#------------------------------------------------------------------------------
+def clear_object_cache():
+    '''Forgets all parsed config files'''
+    _parsed_cache.clear()
 
 
 #==============================================================================
 class ConfigFinder:
     #--------------------------------------------------------------------------
-    def __init__(self, file_name=None, stop_on_first=True):
-        self.locations = list()
+    def __init__(self, file_name=None, stop_on_first=True, env=None):
+        self.locations = deque()
         self.file_name = file_name
         self.__stop_on_first = stop_on_first
 
+        # environment variables (e.g. a snapshot taken by the caller)
+        self.__env = os.environ if env is None else env
+
+        # listings of searched directories, shared between searches
+        # of different files: path -> {name: is_dir}
+        self.__dir_cache = dict()
+
+        # results of searches: (file name, stop on first, locations) -> result
+        self.__search_cache = dict()
+
+        # the caches are not shared between concurrent searches
+        self.__lock = threading.Lock()
+
+        # search key precomputed by freeze()
+        self.__frozen_key = None
+
     #--------------------------------------------------------------------------
     def set_file_name(self, file_name):
+        self.__frozen_key = None
         self.file_name = file_name
 
         for loc in self.locations:
@@ -35,93 +97,117 @@ class ConfigFinder:
 
     #--------------------------------------------------------------------------
     def stop_on_first(self, value=True):
+        self.__frozen_key = None
         self.__stop_on_first = value
 
     #--------------------------------------------------------------------------
     def insert_arg_opt(
             self, pos, name, args,
-            is_dir=False, path_prefix=None, should_exist=True):
+            is_dir=False, path_prefix=None, should_exist=True,
+            resolve=False):
 
         value = args.get(name[2:].replace('-', '_'))
 
         loc = ConfigLoc(
-            ConfigLoc.ARG_OPT, name, value, is_dir, path_prefix, should_exist,
-            self.file_name)
+            ConfigLoc.Kind.ARG_OPT, name, value, is_dir, path_prefix,
+            should_exist, self.file_name, resolve)
 
-        self.locations.insert(pos, loc)
+        self.__insert_loc(pos, loc)
 
     #--------------------------------------------------------------------------
     def insert_env_var(
             self, pos, name,
-            is_dir=False, path_prefix=None, should_exist=True):
+            is_dir=False, path_prefix=None, should_exist=True,
+            resolve=False):
 
-        value = os.environ.get(name)
+        value = self.__env.get(name)
 
         loc = ConfigLoc(
-            ConfigLoc.ENV_VAR, name, value, is_dir, path_prefix, should_exist,
-            self.file_name)
+            ConfigLoc.Kind.ENV_VAR, name, value, is_dir, path_prefix,
+            should_exist, self.file_name, resolve)
 
-        self.locations.insert(pos, loc)
+        self.__insert_loc(pos, loc)
 
     #--------------------------------------------------------------------------
     def insert_path(
             self, pos, name, path,
-            is_dir=False, path_prefix=None, should_exist=True):
+            is_dir=False, path_prefix=None, should_exist=True,
+            resolve=False):
 
         loc = ConfigLoc(
-            ConfigLoc.PATH, name, path, is_dir, path_prefix, should_exist,
-            self.file_name)
+            ConfigLoc.Kind.PATH, name, path, is_dir, path_prefix,
+            should_exist, self.file_name, resolve)
 
-        self.locations.insert(pos, loc)
+        self.__insert_loc(pos, loc)
+
+    #--------------------------------------------------------------------------
+    def __insert_loc(self, pos, loc):
+        self.__frozen_key = None
+
+        if pos == 0:
+            self.locations.appendleft(loc)
+        elif pos == len(self.locations):
+            self.locations.append(loc)
+        else:
+            self.locations.insert(pos, loc)
 
     #--------------------------------------------------------------------------
     def append_arg_opt(
             self, name, args,
-            is_dir=False, path_prefix=None, should_exist=True):
+            is_dir=False, path_prefix=None, should_exist=True,
+            resolve=False):
 
         self.insert_arg_opt(
             len(self.locations), 
-            name, args, is_dir, path_prefix, should_exist)
+            name, args, is_dir, path_prefix, should_exist, resolve)
 
     #--------------------------------------------------------------------------
     def append_env_var(
-            self, name, is_dir=False, path_prefix=None, should_exist=True):
+            self, name, is_dir=False, path_prefix=None, should_exist=True,
+            resolve=False):
 
         self.insert_env_var(
-            len(self.locations), name, is_dir, path_prefix, should_exist)
+            len(self.locations), name, is_dir, path_prefix, should_exist,
+            resolve)
 
     #--------------------------------------------------------------------------
     def append_path(
             self, name, path,
-            is_dir=False, path_prefix=None, should_exist=True):
+            is_dir=False, path_prefix=None, should_exist=True,
+            resolve=False):
 
         self.insert_path(
             len(self.locations), 
-            name, path, is_dir, path_prefix, should_exist)
+            name, path, is_dir, path_prefix, should_exist, resolve)
 
     #--------------------------------------------------------------------------
     def prepend_arg_opt(
             self, name, args,
-            is_dir=False, path_prefix=None, should_exist=True):
-        self.insert_arg_opt(0, name, args, is_dir, path_prefix, should_exist)
+            is_dir=False, path_prefix=None, should_exist=True,
+            resolve=False):
+        self.insert_arg_opt(
+            0, name, args, is_dir, path_prefix, should_exist, resolve)
 
     #--------------------------------------------------------------------------
     def prepend_env_var(
-            self, name, is_dir=False, path_prefix=None, should_exist=True):
-        self.insert_env_var(0, name, is_dir, path_prefix, should_exist)
+            self, name, is_dir=False, path_prefix=None, should_exist=True,
+            resolve=False):
+        self.insert_env_var(
+            0, name, is_dir, path_prefix, should_exist, resolve)
 
     #--------------------------------------------------------------------------
     def prepend_path(
             self, name, path,
-            is_dir=False, path_prefix=None, should_exist=True):
-        self.insert_path(0, name, path, is_dir, path_prefix, should_exist)
+            is_dir=False, path_prefix=None, should_exist=True,
+            resolve=False):
+        self.insert_path(
+            0, name, path, is_dir, path_prefix, should_exist, resolve)
 
     #--------------------------------------------------------------------------
     def delete_loc(self, n):
-        try:
+        if -len(self.locations) <= n < len(self.locations):
+            self.__frozen_key = None
             del self.locations[n]
-        except:
-            pass
 
     #--------------------------------------------------------------------------
     def delete_first_loc(self):
@@ -131,47 +217,120 @@ class ConfigFinder:
     def delete_last_loc(self):
         self.delete_loc(len(self.locations)-1)
 
+    #--------------------------------------------------------------------------
+    def clear_search_cache(self):
+        '''Forgets found files and listings of directories'''
+        with self.__lock:
+            self.__search_cache.clear()
+            self.__dir_cache.clear()
+
+    #--------------------------------------------------------------------------
+    def freeze(self):
+        '''Precomputes the search key of the configured locations
+
+        The key is dropped by any method changing the finder, but not by
+        direct modification of the locations.
+        '''
+        self.__frozen_key = self.__search_key()
+
     #--------------------------------------------------------------------------
     def find(self):
-        paths = list()
+        key = self.__frozen_key
+
+        if key is None:
+            key = self.__search_key()
+
+        with self.__lock:
+            if key in self.__search_cache:
+                result = self.__search_cache[key]
+            else:
+                result = self.__search()
+                self.__search_cache[key] = result
+
+        return list(result) if type(result) is list else result
+
+    #--------------------------------------------------------------------------
+    @classmethod
+    def find_many(cls, finders):
+        '''Searches with several finders concurrently
+
+        Returns the list of results of the finders (in the same order).
+        '''
+        if len(finders) == 0:
+            return list()
+
+        with ThreadPoolExecutor(max_workers=min(32, len(finders))) as executor:
+            return list(executor.map(cls.find, finders))
+
+    #--------------------------------------------------------------------------
+    def __search_key(self):
+        return (
+            self.file_name, self.__stop_on_first,
+            tuple(
+                (loc.kind, loc.name, loc.value, loc.is_dir, loc.path_prefix,
+                 loc.should_exist, loc.resolve)
+                for loc in self.locations))
+
+    #--------------------------------------------------------------------------
+    def __search(self):
+        found = list()
 
         for loc in self.locations:
             try:
-                result = loc.find()
+                result = loc.find(self.__dir_cache)
             except PathError as e:
                 raise ConfigFinderError(loc) from e
 
-            debug_msg = f'Searching in the {loc}: '
-            msg_tag = 'CONFIG'
+            if is_debug():
+                print_debug(
+                    f"Searching in the {loc}: "
+                    f"{'not found' if result is None else 'ok'}", 'CONFIG')
 
             if result is None:
-                print_debug(debug_msg + 'not found', msg_tag)
                 continue
 
-            print_debug(debug_msg + 'ok', msg_tag)
-            paths.append(result)
+            found.append(Path(result))
 
             if self.__stop_on_first:
                 break
 
-        if len(paths) == 0:
+        if len(found) == 0:
             return None
         elif self.__stop_on_first:
-            return paths[0]
+            return found[0]
         else:
-            return paths
+            return found
 
 
 #==============================================================================
 class ConfigLoc:
-    ARG_OPT = 0
-    ENV_VAR = 1
-    PATH = 2
+    __slots__ = (
+        'kind', 'name', 'value', 'is_dir', 'path_prefix', 'should_exist',
+        'file_name', 'resolve', '__path')
+
+    class Kind(IntEnum):
+        ARG_OPT = 0
+        ENV_VAR = 1
+        PATH = 2
+
+    # string forms of locations, indexed by the kind
+    _str_templates = (
+        "path from command-line option '{name}'",
+        "path from environment variable '${name}'",
+        "{name}: {value}")
 
     #--------------------------------------------------------------------------
     def __init__(
             self, kind, name, value,
-            is_dir, path_prefix, should_exist, file_name):
+            is_dir, path_prefix, should_exist, file_name, resolve=False):
+        # paths are kept as strings, the found path is converted to Path
+        # by ConfigFinder
+        if value is not None:
+            value = os.fspath(value)
+
+        if path_prefix is not None:
+            path_prefix = os.fspath(path_prefix)
+
         self.kind = kind
         self.name = name
         self.value = value
@@ -180,48 +339,120 @@ class ConfigLoc:
         self.should_exist = should_exist
         self.file_name = file_name
 
+        # symbolic links are resolved in found paths only if it's required
+        # (e.g. paths in the file are relative to its real location)
+        self.resolve = resolve
+
+        # the path does not depend on the searched file, so it is joined
+        # once (None if it is relative without a prefix)
+        if value is None or os.path.isabs(value):
+            self.__path = value
+        elif path_prefix is not None:
+            self.__path = os.path.join(path_prefix, value)
+        else:
+            self.__path = None
+
     #--------------------------------------------------------------------------
-    def find(self):
+    def find(self, dir_cache=None):
         if self.value is None:
             return None
 
-        path = Path(self.value)
+        path = self.__path
+
+        if path is None:
+            raise PathError(self.value, PathError.Kind.NOT_ABS)
+
+        probe = None
 
-        if self.path_prefix is None and not path.is_absolute():
-            raise PathError(path, PathError.Kind.NOT_ABS)
-        elif not path.is_absolute():
-            path = Path(self.path_prefix) / path
+        if self.should_exist:
+            probe = _probe(path)
 
-        if self.should_exist and not path.exists():
-            raise PathError(path, PathError.Kind.NOT_EXIST)
+            if not probe.exists:
+                raise PathError(path, PathError.Kind.NOT_EXIST)
 
         if self.is_dir:
-            if self.should_exist and not path.is_dir():
+            if probe is not None and not probe.is_dir:
                 raise PathError(path, PathError.Kind.NOT_DIR)
 
-            file_path = path / self.file_name
+            file_path = os.path.join(path, self.file_name)
+            probe = None
         else:
             file_path = path
 
-        file_path = file_path.resolve()
+        entries = None
+
+        if self.is_dir and dir_cache is not None:
+            if path in dir_cache:
+                entries = dir_cache[path]
+            else:
+                entries = self.__scan_dir(path)
+                dir_cache[path] = entries
+
+        # a directory which can't be listed (e.g. execute-only) is checked
+        # by probing of the file
+        if entries is not None:
+            is_dir = entries.get(self.file_name)
+
+            if is_dir is None:
+                return None
+
+            if self.resolve:
+                file_path = paths.realpath(file_path)
+
+            if is_dir:
+                raise PathError(file_path, PathError.Kind.NOT_FILE)
+            else:
+                return file_path
 
-        if file_path.is_dir():
+        if self.resolve:
+            file_path = paths.realpath(file_path)
+
+        # resolving does not change the target, so the probe of the path
+        # itself (if any) is valid for the file
+        if probe is None:
+            probe = _probe(file_path)
+
+        if probe.is_dir:
             raise PathError(file_path, PathError.Kind.NOT_FILE)
 
-        if file_path.exists():
+        if probe.exists:
             return file_path
         else:
             return None
 
+    #--------------------------------------------------------------------------
+    def __scan_dir(self, path):
+        '''Lists the directory: {name: is_dir}, None if it can't be read'''
+        entries = dict()
+
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    # skip broken (or looping) links, special files are
+                    # kept as files
+                    try:
+                        if entry.is_dir():
+                            entries[entry.name] = True
+                        elif entry.is_file() or _probe(entry.path).exists:
+                            entries[entry.name] = False
+
+                    except OSError as e:
+                        if not paths.is_missing_error(e):
+                            raise
+
+        except PermissionError:
+            return None
+
+        except OSError as e:
+            if not paths.is_missing_error(e):
+                raise
+
+        return entries
+
     #--------------------------------------------------------------------------
     def __str__(self):
-        match self.kind:
-            case self.ARG_OPT:
-                return f"path from command-line option '{self.name}'"
-            case self.ENV_VAR:
-                return f"path from environment variable '${self.name}'"
-            case self.PATH:
-                return f"{self.name}: {self.value}"
+        return self._str_templates[self.kind].format(
+            name=self.name, value=self.value)
 
 
 #==============================================================================
@@ -235,21 +466,46 @@ class ConfigLoader:
     #--------------------------------------------------------------------------
     def load(self):
         try:
-            f = open(self.file_path, 'rb')
+            st = os.stat(self.file_path)
         except Exception as e:
             raise ConfigLoaderError(
-                ConfigLoaderError.Kind.OPEN, path=file_path) from e
+                ConfigLoaderError.Kind.OPEN, path=self.file_path) from e
+
+        key = (str(self.file_path), self.format, st.st_mtime_ns, st.st_size)
+        data = _parsed_cache.get(key)
+
+        if data is None:
+            data = self.__parse()
+            _parsed_cache[key] = data
+
+        # callers are free to modify the returned data (e.g. flows merging)
+        return copy.deepcopy(data)
+
+    #--------------------------------------------------------------------------
+    def __parse(self):
+        # the file is read at once and closed before parsing
+        try:
+            data = Path(self.file_path).read_bytes()
+        except Exception as e:
+            raise ConfigLoaderError(
+                ConfigLoaderError.Kind.OPEN, path=self.file_path) from e
 
         if self.format == 'toml':
-            return self.load_toml(f)
+            return self.load_toml(data)
         else:
             raise ConfigLoaderError(
-                ConfigLoaderError.Kind.FORMAT, format=format)
+                ConfigLoaderError.Kind.FORMAT, format=self.format)
 
     #--------------------------------------------------------------------------
-    def load_toml(self, f):
+    def load_toml(self, data):
         try:
-            return tomllib.load(f)
+            text = data.decode('utf-8')
+
+            if rtoml is not None:
+                return rtoml.loads(text)
+            else:
+                return tomllib.loads(text)
+
         except Exception as e:
             raise ConfigLoaderError(
-                ConfigLoaderError.Kind.LOAD, path=f.name) from e
+                ConfigLoaderError.Kind.LOAD, path=self.file_path) from e
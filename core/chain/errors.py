@@ -29,6 +29,8 @@ class PathError(ChainException):
         NOT_EXIST = auto()
 
     def __init__(self, path, kind):
+        # arguments are passed to recreate the exception (e.g. unpickling)
+        super().__init__(path, kind)
         self.path = path
         self.kind = kind
 
@@ -57,40 +59,39 @@ class ConfigError(ChainException):
         PARAMS_NOT_FOUND = auto()
         NO_CONFIG_PARAM = auto()
 
+    _formats = {
+        Kind.FINDING_ERROR:
+            "config file finding is failed",
+        Kind.FILE_NOT_FOUND:
+            "config file does not found",
+        Kind.LOADING_ERROR:
+            "loading error of the config file: {path}",
+        Kind.NO_ENTITY_DATA:
+            "entry key '{entry}' does not found or empty{file_path_msg}",
+        Kind.PARAMS_NOT_FOUND:
+            "no parameters is found in the entry '{entry}'{file_path_msg}",
+        Kind.NO_CONFIG_PARAM:
+            "required parameter '{param}' does not found in the entry "
+            "'{entry}'{file_path_msg}",
+    }
+
     def __init__(self, kind, **kw):
+        super().__init__(kind)
         self.kind = kind
         self.kw = kw
 
     def __str__(self):
+        fmt = self._formats.get(self.kind)
+
+        if fmt is None:
+            return 'unknown kind of the error'
+
         if 'path' in self.kw:
-            file_path_msg = " (in file: {self.kw['path']})"
+            file_path_msg = f" (in file: {self.kw['path']})"
         else:
             file_path_msg = ''
 
-        match self.kind:
-            case self.Kind.FINDING_ERROR:
-                return "config file finding is failed"
-
-            case self.Kind.FILE_NOT_FOUND:
-                return "config file does not found"
-
-            case self.Kind.LOADING_ERROR:
-                return f"loading error of the config file: {self.kw['path']}"
-
-            case self.Kind.NO_ENTITY_DATA:
-                return (f"entry key '{self.kw['entry']}' does not found "
-                        f"or empty{file_path_msg}")
-
-            case self.Kind.PARAMS_NOT_FOUND:
-                return (f"no parameters is found in the entry"
-                        f"'{self.kw['entry']}'{file_path_msg}")
-
-            case self.Kind.NO_CONFIG_PARAM:
-                return (f"required parameter '{self.kw['param']}' "
-                        f"does not found in the entry '{self.kw['entry']}'"
-                        f"{file_path_msg}")
-
-        return 'unknown kind of the error'
+        return fmt.format(file_path_msg=file_path_msg, **self.kw)
 
 
 #==============================================================================
@@ -100,25 +101,30 @@ class ConfigLoaderError(ChainException):
         LOAD = auto()
         FORMAT = auto()
 
+    _formats = {
+        Kind.OPEN: "opening error of the file '{path}'",
+        Kind.LOAD: "incorrect format of the file '{path}'",
+        Kind.FORMAT: "unsupported config format '{format}'",
+    }
+
     def __init__(self, kind, **kw):
+        super().__init__(kind)
         self.kind = kind
         self.kw = kw
 
     def __str__(self):
-        match self.kind:
-            case self.Kind.OPEN:
-                return f"opening error of the file '{self.kw['path']}'"
-            case self.Kind.LOAD:
-                return f"incorrect format of the file '{self.kw['path']}'"
-            case self.Kind.FORMAT:
-                return f"unsupported config format '{self.kw['format']}'"
+        fmt = self._formats.get(self.kind)
 
-        return 'unknown kind of the error'
+        if fmt is None:
+            return 'unknown kind of the error'
+
+        return fmt.format(**self.kw)
 
 
 #==============================================================================
 class ConfigFinderError(ChainException):
     def __init__(self, loc):
+        super().__init__(loc)
         self.loc = loc
 
     def __str__(self):
@@ -131,17 +137,23 @@ class BuildEnvError(ChainException):
         TOOL_NOT_FOUND = auto()
         TOOL_VERSION = auto()
 
+    _formats = {
+        Kind.TOOL_NOT_FOUND:
+            "required build tool '{tool}' was not found",
+        Kind.TOOL_VERSION:
+            "requested version(s) of the tool '{tool}' was not found: "
+            "{version}",
+    }
+
     def __init__(self, kind, **kw):
+        super().__init__(kind)
         self.kind = kind
         self.kw = kw
 
     def __str__(self):
-        if self.kind == self.Kind.TOOL_NOT_FOUND:
-            msg = f"required build tool '{kw['tool']}' was not found"
-        elif self.kind == self.Kind.TOOL_VERSION:
-            msg = (f"requested version(s) of the tool '{kw['tool']}' "
-                   f"was not found: {kw['version']}")
-        else:
-            msg = 'unknown kind of the error'
+        fmt = self._formats.get(self.kind)
 
-        return f"{msg}: {self.path}"
+        if fmt is None:
+            return 'unknown kind of the error'
+
+        return fmt.format(**self.kw)
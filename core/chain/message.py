@@ -8,7 +8,7 @@
 #
 #******************************************************************************
 
-import os
+import functools
 
 
 #******************************************************************************
@@ -19,6 +19,14 @@ _console = None
 _debug = False
 _quiet = False
 
+# message prefixes of severities
+_severity_prefix = {
+    'info': 'INFO: ',
+    'warning': 'WARNING: ',
+    'error': 'ERROR: ',
+    'debug': 'DEBUG: ',
+}
+
 
 #******************************************************************************
 # Functions
@@ -37,16 +45,29 @@ def print_warning(msg, tag):
 def print_error(msg, tag):
     _print_message('error', msg, tag)
 
+#------------------------------------------------------------------------------
+def is_debug():
+    '''Checks if debug messages are enabled (to skip building of them)'''
+    return _debug
+
 #------------------------------------------------------------------------------
 def print_debug(msg, tag):
-    if _debug:
-        try:
-            _console.get_style('debug')
-            normal_print = False
-        except:
-            normal_print = True
+    if not _debug:
+        return
 
-        _print_message('debug', msg, tag, normal_print)
+    try:
+        _console.get_style('debug')
+        normal_print = False
+    except:
+        normal_print = True
+
+    _print_message('debug', msg, tag, normal_print)
+
+#------------------------------------------------------------------------------
+def print_debug_lazy(get_msg, tag):
+    '''Prints debug message returned by get_msg() (called if debug is on)'''
+    if _debug:
+        print_debug(get_msg(), tag)
 
 
 #******************************************************************************
@@ -54,6 +75,7 @@ def print_debug(msg, tag):
 #
 
 #------------------------------------------------------------------------------
+@functools.lru_cache(maxsize=256)
 def _get_msg_tag(tag):
     if (tag is None) or (len(tag.strip()) == 0):
         return ''
@@ -62,7 +84,7 @@ def _get_msg_tag(tag):
 
 #------------------------------------------------------------------------------
 def _print_message(severity, msg, tag, normal_print=False):
-    msg = f'{severity.upper()}: ' + _get_msg_tag(tag) + msg
+    msg = _severity_prefix[severity] + _get_msg_tag(tag) + msg
 
     if (_console is not None) and (not normal_print):
         _console.print(f'[{severity}]{msg}[/{severity}]')
@@ -0,0 +1,42 @@
+#******************************************************************************
+#
+#  Project: Build system for FPGA/ASIC
+#
+#  Description: Cached path operations
+#
+#  Copyright (c) 2024 Anton Polstyankin <mail@pavhw.org>
+#
+#******************************************************************************
+
+import os
+import errno
+import functools
+
+
+#******************************************************************************
+# Globals
+#
+
+# errors of stat() meaning that the path does not exist (as in pathlib)
+_missing_errnos = frozenset(
+    (errno.ENOENT, errno.ENOTDIR, errno.EBADF, errno.ELOOP))
+
+
+#******************************************************************************
+# Functions
+#
+
+#------------------------------------------------------------------------------
+@functools.lru_cache(maxsize=1024)
+def realpath(path):
+    '''Cached os.path.realpath() (config files rarely move during a build)'''
+    return os.path.realpath(path)
+
+#------------------------------------------------------------------------------
+def is_missing_error(e):
+    '''Checks if the OSError means that the path does not exist'''
+    return e.errno in _missing_errnos
+
+#------------------------------------------------------------------------------
+def clear_caches():
+    realpath.cache_clear()
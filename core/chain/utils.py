@@ -9,45 +9,100 @@
 #******************************************************************************
 
 import os
+import stat
+import functools
 from pathlib import Path
 
 from chain.errors import *
 from chain.message import *
+from chain import paths
 
 
+#------------------------------------------------------------------------------
+def require_abs(path):
+    if not os.path.isabs(path):
+        raise PathError(path, PathError.Kind.NOT_ABS)
+
 #------------------------------------------------------------------------------
 def check_path(path, *, is_abs=False, is_file=True, is_dir=True):
-    if is_abs and not path.is_absolute():
-        raise PathError(path, ConfigPathError.Kind.NOT_ABS)
+    if is_abs:
+        require_abs(path)
 
     if not is_file and not is_dir:
         return
 
-    if not path.exists():
-        raise PathError(path, ConfigPathError.Kind.NOT_EXIST)
-
+    # the kind of the path is not needed, only its existence
     if is_file and is_dir:
+        if not os.access(path, os.F_OK):
+            raise PathError(path, PathError.Kind.NOT_EXIST)
+
         return
 
-    if is_file and not path.is_file():
-        raise PathError(path, ConfigPathError.Kind.NOT_FILE)
+    # the kind of the path is checked with a single stat() call
+    try:
+        mode = os.stat(path).st_mode
+    except OSError as e:
+        if not paths.is_missing_error(e):
+            raise
+
+        raise PathError(path, PathError.Kind.NOT_EXIST) from None
+
+    if is_file and not stat.S_ISREG(mode):
+        raise PathError(path, PathError.Kind.NOT_FILE)
+
+    if is_dir and not stat.S_ISDIR(mode):
+        raise PathError(path, PathError.Kind.NOT_DIR)
+
+#------------------------------------------------------------------------------
+def _make_path_check(is_abs, is_kind, not_kind_error):
+    '''Makes check_path() specialized for a fixed combination of flags'''
+    def check(path):
+        if is_abs and not os.path.isabs(path):
+            raise PathError(path, PathError.Kind.NOT_ABS)
+
+        try:
+            mode = os.stat(path).st_mode
+        except OSError as e:
+            if not paths.is_missing_error(e):
+                raise
+
+            raise PathError(path, PathError.Kind.NOT_EXIST) from None
+
+        if not is_kind(mode):
+            raise PathError(path, not_kind_error)
 
-    if is_dir and not path.is_dir():
-        raise PathError(path, ConfigPathError.Kind.NOT_DIR)
+    return check
+
+check_abs_file = _make_path_check(True, stat.S_ISREG, PathError.Kind.NOT_FILE)
+check_file = _make_path_check(False, stat.S_ISREG, PathError.Kind.NOT_FILE)
+check_dir = _make_path_check(False, stat.S_ISDIR, PathError.Kind.NOT_DIR)
 
 #--------------------------------------------------------------------------
 def normalize_path(current_path, relative_path):
-    assert current_path.is_absolute()
+    '''Makes the path absolute and normalized, without resolving of links
+
+    The current path should be a real (resolved) directory, e.g. the real
+    directory of the config file with the relative path.
+    '''
+    return _normalize_path(str(current_path), str(relative_path))
 
-    if os.path.isabs(relative_path):
+#--------------------------------------------------------------------------
+@functools.lru_cache(maxsize=512)
+def _normalize_path(current_path, relative_path):
+    assert os.path.isabs(current_path)
+
+    # the paths are strings here, so the check is done inline (POSIX)
+    if relative_path.startswith(os.sep):
         return Path(relative_path)
 
-    return (current_path / relative_path).resolve()
+    # the current path is real, so '..' is not followed through a link
+    return Path(os.path.abspath(os.path.join(current_path, relative_path)))
+
+#--------------------------------------------------------------------------
+def fail(msg, tag, exception):
+    print_error(msg, tag)
+    raise exception
 
 #--------------------------------------------------------------------------
-def wrong(msg, tag, exception=None):
-    if exception is not None:
-        print_error(msg, tag)
-        raise exception
-    else:
-        print_warning(msg, tag)
+def warn(msg, tag):
+    print_warning(msg, tag)
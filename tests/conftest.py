@@ -15,6 +15,15 @@ from pathlib import Path
 
 import pytest
 
+# tests are run from the repository root, it does not change
+_CWD = Path.cwd().resolve()
+
+# the build system package is imported by test modules at collection
+sys.path.append(str(_CWD / 'core'))
+
+# the run script module, it's loaded by pytest_configure()
+_main = None
+
 
 #==============================================================================
 class RunWithArgs:
@@ -47,20 +56,34 @@ class RunWithArgs:
 
 
 #------------------------------------------------------------------------------
-@pytest.fixture(scope="session")
-def main():
+def pytest_configure(config):
+    global _main
+    _main = _load_main_module()
+
+#------------------------------------------------------------------------------
+def _load_main_module():
     '''Load the run script as module'''
 
-    script_path = str(Path.cwd() / 'bin' / 'chain')
+    script_path = str(_CWD / 'bin' / 'chain')
+
+    # the name differs from the 'chain' package imported by the script
+    name = 'chain_main'
 
     spec = importlib.util.spec_from_loader(
-        'chain', importlib.machinery.SourceFileLoader('chain', script_path))
+        name, importlib.machinery.SourceFileLoader(name, script_path))
 
     module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
     spec.loader.exec_module(module)
 
     return module
 
+#------------------------------------------------------------------------------
+@pytest.fixture(scope="session")
+def main():
+    '''The run script loaded as module (once, at configuring of pytest)'''
+    return _main
+
 #------------------------------------------------------------------------------
 @pytest.fixture
 def run_chain(main, fake_chain_root):
@@ -69,7 +92,7 @@ def run_chain(main, fake_chain_root):
 #------------------------------------------------------------------------------
 @pytest.fixture(scope="session")
 def cwd():
-    return Path.cwd()
+    return _CWD
 
 
 #******************************************************************************
@@ -77,33 +100,24 @@ def cwd():
 #
 
 #------------------------------------------------------------------------------
-@pytest.fixture(autouse=True)
-def fake_chain_root(tmp_path, cwd):
-    root = tmp_path / 'chain_root'
-    root.mkdir()
+@pytest.fixture(autouse=True, scope="session")
+def fake_chain_root(tmp_path_factory, cwd):
+    # the root is not modified by tests, so it's built once and shared by
+    # all of them
+    root = tmp_path_factory.mktemp('chain_root', numbered=False)
 
-    core_path = root / 'core'
-    core_path.symlink_to(cwd / 'core', target_is_directory=True)
+    os.makedirs(root / 'config', exist_ok=True)
+    os.symlink(cwd / 'core', root / 'core')
+    os.symlink(cwd / 'config' / 'theme.toml', root / 'config' / 'theme.toml')
 
     return root.resolve()
 
 #------------------------------------------------------------------------------
-@pytest.fixture(autouse=True)
+@pytest.fixture(scope="session")
 def fake_config_dir(fake_chain_root):
-    cfg_dir = fake_chain_root / 'config'
-    cfg_dir.mkdir()
-
-    return cfg_dir
+    return fake_chain_root / 'config'
 
 #------------------------------------------------------------------------------
-@pytest.fixture(autouse=True)
-def theme_config_link(cwd, fake_config_dir):
-    file = cwd / 'config' / 'theme.toml'
-    link = fake_config_dir / 'theme.toml'
-
-    link.symlink_to(file, target_is_directory=False)
-
-#------------------------------------------------------------------------------
-@pytest.fixture(autouse=True, scope="session")
-def add_core_dir_to_sys_path():
-    sys.path.append(os.path.join(os.getcwd(), 'core'))
\ No newline at end of file
+@pytest.fixture(scope="session")
+def theme_config_link(fake_config_dir):
+    return fake_config_dir / 'theme.toml'
@@ -0,0 +1,325 @@
+#******************************************************************************
+#
+#  Project: Build system for FPGA/ASIC
+#
+#  Description: Tests for gathering of the build environment
+#
+#  Copyright (c) 2024 Anton Polstyankin <mail@pavhw.org>
+#
+#******************************************************************************
+
+import os
+import pickle
+
+import pytest
+
+import chain
+
+
+#******************************************************************************
+# Tests
+#
+
+#------------------------------------------------------------------------------
+def test_linked_config_files(
+        main, fake_chain_root, project_root, config_tree, config_home):
+    for name in ['tools.toml', 'flows.toml']:
+        os.symlink(config_tree / name, config_home / name)
+
+    env = make_env(main, fake_chain_root, project_root)
+
+    # relative paths are taken from the real location of the files
+    assert env.flows().get_scons_tool_path('myflow') == \
+        config_tree / 'flows' / 'myflow.py'
+    assert env.tools().get_scons_tool_path('questa') == \
+        config_tree / 'tools' / 'questa'
+
+#------------------------------------------------------------------------------
+def test_env_cache_hit(
+        main, fake_chain_root, project_root, config_home, env_cache, capsys):
+    make_env(main, fake_chain_root, project_root)
+    assert len(list(env_cache.iterdir())) == 1
+
+    capsys.readouterr()
+    env = make_env(main, fake_chain_root, project_root)
+
+    assert 'loaded from the cache' in capsys.readouterr().out
+    assert env.flows().flows() == ['myflow']
+    assert env.tools().get_path('questa', '2021') == '/opt/questa/2021/bin'
+
+#------------------------------------------------------------------------------
+def test_env_cache_changed_config(
+        main, fake_chain_root, project_root, config_home, env_cache, capsys):
+    make_env(main, fake_chain_root, project_root)
+
+    with open(config_home / 'flows.toml', 'a') as f:
+        f.write('# changed\n')
+
+    capsys.readouterr()
+    make_env(main, fake_chain_root, project_root)
+
+    assert 'loaded from the cache' not in capsys.readouterr().out
+    assert len(list(env_cache.iterdir())) == 2
+
+#------------------------------------------------------------------------------
+def test_env_cache_corrupted(
+        main, fake_chain_root, project_root, config_home, env_cache, capsys):
+    make_env(main, fake_chain_root, project_root)
+
+    for path in env_cache.iterdir():
+        path.write_bytes(b'corrupted')
+
+    capsys.readouterr()
+    env = make_env(main, fake_chain_root, project_root)
+    out = capsys.readouterr().out
+
+    assert "can't be loaded" in out
+    assert 'loaded from the cache' not in out
+    assert env.flows().flows() == ['myflow']
+
+#------------------------------------------------------------------------------
+def test_env_cache_unexpected_contents(
+        main, fake_chain_root, project_root, config_home, env_cache, capsys):
+    make_env(main, fake_chain_root, project_root)
+
+    for path in env_cache.iterdir():
+        path.write_bytes(pickle.dumps(({}, {})))
+
+    capsys.readouterr()
+    env = make_env(main, fake_chain_root, project_root)
+
+    assert 'unexpected contents' in capsys.readouterr().out
+    assert env.flows().flows() == ['myflow']
+
+#------------------------------------------------------------------------------
+def test_env_cache_other_version(
+        main, fake_chain_root, project_root, config_home, env_cache,
+        monkeypatch, capsys):
+    make_env(main, fake_chain_root, project_root)
+
+    monkeypatch.setattr(
+        chain.BuildEnv, 'env_cache_version',
+        chain.BuildEnv.env_cache_version + 1)
+
+    capsys.readouterr()
+    make_env(main, fake_chain_root, project_root)
+
+    assert 'loaded from the cache' not in capsys.readouterr().out
+    assert len(list(env_cache.iterdir())) == 2
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('value, enabled', [
+    ('yes', True), ('True', True), ('0', False), ('off', False)])
+def test_env_cache_opt_in(
+        main, fake_chain_root, project_root, config_home, env_cache,
+        monkeypatch, value, enabled):
+    monkeypatch.setenv('CHAIN_ENV_CACHE', value)
+    make_env(main, fake_chain_root, project_root)
+
+    assert env_cache.exists() == enabled
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('location, expected, service, path', [
+    ('docker:questa_2021',
+     {'where': 'docker', 'service': 'questa_2021'}, 'questa_2021', None),
+    ('path:/opt/questa/2021/bin',
+     {'where': 'path', 'path': '/opt/questa/2021/bin'},
+     None, '/opt/questa/2021/bin'),
+])
+def test_tool_location(
+        main, fake_chain_root, project_root, config_tree, config_home,
+        location, expected, service, path):
+    write_tools_config(config_tree, config_home, location)
+
+    tools = make_env(main, fake_chain_root, project_root).tools()
+
+    assert tools.get_location('questa', '2021') == expected
+    assert tools.get_docker_service('questa', '2021') == service
+    assert tools.get_path('questa', '2021') == path
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('location', [
+    'dockr:questa_2021', 'questa_2021', 'path', 'docker', 'path:', 'docker:'])
+def test_tool_bad_location(
+        main, fake_chain_root, project_root, config_tree, config_home,
+        location):
+    write_tools_config(config_tree, config_home, location)
+
+    err = chain.errors.ConfigError
+
+    with pytest.raises(err) as einfo:
+        make_env(main, fake_chain_root, project_root)
+
+    assert einfo.value.kind == err.Kind.NO_CONFIG_PARAM
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('required, selected', [
+    ('"2023.2"', '2023.2'),
+    ('"2020*"', '2020.1'),
+    ('["2019*", "2023*"]', '2023.2'),
+    # patterns are checked in the order of priority, not available versions
+    ('["2023*", "2020*"]', '2023.2'),
+    ('["*", "2023*"]', '2020.1'),
+])
+def test_tool_version(
+        main, fake_chain_root, project_root, config_tree, config_home,
+        required, selected):
+    write_versions_config(config_tree, config_home, required)
+
+    tools = make_env(main, fake_chain_root, project_root).tools()
+    assert tools.versions('questa') == (selected,)
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('required', ['"2019*"', '["2019*", "2021.1"]'])
+def test_tool_version_not_found(
+        main, fake_chain_root, project_root, config_tree, config_home,
+        required):
+    write_versions_config(config_tree, config_home, required)
+
+    err = chain.errors.BuildEnvError
+
+    with pytest.raises(err) as einfo:
+        make_env(main, fake_chain_root, project_root)
+
+    assert einfo.value.kind == err.Kind.TOOL_VERSION
+
+#------------------------------------------------------------------------------
+def test_env_after_init(
+        main, fake_chain_root, project_root, config_tree, config_home,
+        monkeypatch, tmp_path):
+    for name in ['tools.toml', 'flows.toml']:
+        os.symlink(config_tree / name, config_home / name)
+
+    make_env(main, fake_chain_root, project_root)
+
+    # the environment snapshot belongs to the initialization only
+    monkeypatch.setenv('CHAIN_TEST_CONFIG', str(tmp_path))
+
+    finder = chain.config.ConfigFinder('tools.toml')
+    finder.append_env_var('CHAIN_TEST_CONFIG', is_dir=True)
+
+    assert finder.locations[0].value == str(tmp_path)
+
+#------------------------------------------------------------------------------
+def test_flows_using():
+    flows = chain.BuildFlows(chain.BuildTools())
+
+    for name in ['first', 'second']:
+        flows.add(name, None)
+        flows.add_tool(name, 'questa', '2021')
+
+    assert flows.flows_using('questa', '2021') == ('first', 'second')
+
+    # the version of the tool is changed for one flow
+    flows.add_tool('first', 'questa', '2023')
+
+    assert flows.flows_using('questa', '2021') == ('second',)
+    assert flows.flows_using('questa', '2023') == ('first',)
+    assert flows.flows_using('vivado', '2023') == ()
+
+
+#******************************************************************************
+# Fixtures
+#
+
+#------------------------------------------------------------------------------
+@pytest.fixture(autouse=True)
+def isolated_env(monkeypatch, tmp_path):
+    '''Hides config and cache directories of the user'''
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+
+    for name in [
+            'XDG_CONFIG_HOME', 'XDG_CACHE_HOME', 'CHAIN_CONFIG_HOME',
+            'CHAIN_ENV_CACHE']:
+        monkeypatch.delenv(name, raising=False)
+
+#------------------------------------------------------------------------------
+@pytest.fixture
+def config_home(monkeypatch, tmp_path):
+    config_home = tmp_path / 'config_home'
+    config_home.mkdir()
+
+    monkeypatch.setenv('CHAIN_CONFIG_HOME', str(config_home))
+
+    return config_home
+
+#------------------------------------------------------------------------------
+@pytest.fixture
+def env_cache(monkeypatch, tmp_path, config_tree, config_home):
+    '''Enables the environment cache, returns the cache directory'''
+    for name in ['tools.toml', 'flows.toml']:
+        (config_home / name).write_bytes((config_tree / name).read_bytes())
+
+    os.symlink(config_tree / 'flows', config_home / 'flows')
+    os.symlink(config_tree / 'tools', config_home / 'tools')
+
+    monkeypatch.setenv('CHAIN_ENV_CACHE', '1')
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+
+    return tmp_path / 'cache' / 'chain'
+
+#------------------------------------------------------------------------------
+@pytest.fixture
+def project_root(tmp_path):
+    project_root = tmp_path / 'project'
+    project_root.mkdir()
+
+    return project_root
+
+#------------------------------------------------------------------------------
+@pytest.fixture
+def config_tree(tmp_path):
+    '''Tools and flows configuration with relative paths'''
+    root = tmp_path / 'configs'
+
+    (root / 'flows').mkdir(parents=True)
+    (root / 'flows' / 'myflow.py').touch()
+    (root / 'tools').mkdir()
+    (root / 'tools' / 'questa').touch()
+
+    (root / 'tools.toml').write_text(
+        '[tool.questa]\n'
+        'path = "tools/questa"\n'
+        'versions = { "2021" = "path:/opt/questa/2021/bin" }\n')
+
+    (root / 'flows.toml').write_text(
+        '[flow.myflow]\n'
+        'path = "flows/myflow.py"\n'
+        'tools = { questa = "2021" }\n')
+
+    return root.resolve()
+
+
+#******************************************************************************
+# Functions
+#
+
+#------------------------------------------------------------------------------
+def make_env(main, root_path, project_root, *args):
+    parser = main.get_command_line_parser()
+    parsed_args = parser.parse_args(
+        ['--project-root', str(project_root), *args, 'myflow'])
+
+    return chain.BuildEnv(root_path, parsed_args)
+
+#------------------------------------------------------------------------------
+def write_tools_config(config_tree, config_home, location):
+    (config_home / 'tools.toml').write_text(
+        '[tool.questa]\n'
+        f'path = "{config_tree / "tools" / "questa"}"\n'
+        f'versions = {{ "2021" = "{location}" }}\n')
+
+    os.symlink(config_tree / 'flows.toml', config_home / 'flows.toml')
+
+#------------------------------------------------------------------------------
+def write_versions_config(config_tree, config_home, required):
+    (config_home / 'tools.toml').write_text(
+        '[tool.questa]\n'
+        f'path = "{config_tree / "tools" / "questa"}"\n'
+        'versions = { "2020.1" = "path:/opt/q20", "2023.2" = "path:/opt/q23" }'
+        '\n')
+
+    (config_home / 'flows.toml').write_text(
+        '[flow.myflow]\n'
+        f'path = "{config_tree / "flows" / "myflow.py"}"\n'
+        f'tools = {{ questa = {required} }}\n')
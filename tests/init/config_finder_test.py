@@ -0,0 +1,196 @@
+#******************************************************************************
+#
+#  Project: Build system for FPGA/ASIC
+#
+#  Description: Tests for searching of configuration files
+#
+#  Copyright (c) 2024 Anton Polstyankin <mail@pavhw.org>
+#
+#******************************************************************************
+
+import os
+
+import pytest
+
+import chain.config
+
+
+#******************************************************************************
+# Tests
+#
+
+#------------------------------------------------------------------------------
+def test_find_first(finder, config_dirs):
+    (config_dirs[1] / 'tools.toml').touch()
+    (config_dirs[2] / 'tools.toml').touch()
+
+    finder.set_file_name('tools.toml')
+    assert finder.find() == (config_dirs[1] / 'tools.toml').resolve()
+
+#------------------------------------------------------------------------------
+def test_find_all(finder, config_dirs):
+    (config_dirs[0] / 'flows.toml').touch()
+    (config_dirs[2] / 'flows.toml').touch()
+
+    finder.set_file_name('flows.toml')
+    finder.stop_on_first(False)
+
+    assert finder.find() == [
+        (config_dirs[0] / 'flows.toml').resolve(),
+        (config_dirs[2] / 'flows.toml').resolve()]
+
+#------------------------------------------------------------------------------
+def test_find_different_files(finder, config_dirs):
+    (config_dirs[0] / 'theme.toml').touch()
+    (config_dirs[2] / 'tools.toml').touch()
+
+    finder.set_file_name('theme.toml')
+    assert finder.find() == (config_dirs[0] / 'theme.toml').resolve()
+
+    finder.set_file_name('tools.toml')
+    assert finder.find() == (config_dirs[2] / 'tools.toml').resolve()
+
+#------------------------------------------------------------------------------
+def test_find_cached(finder, config_dirs):
+    (config_dirs[2] / 'tools.toml').touch()
+
+    finder.set_file_name('tools.toml')
+    assert finder.find() == (config_dirs[2] / 'tools.toml').resolve()
+
+    (config_dirs[0] / 'tools.toml').touch()
+    assert finder.find() == (config_dirs[2] / 'tools.toml').resolve()
+
+    finder.clear_search_cache()
+    assert finder.find() == (config_dirs[0] / 'tools.toml').resolve()
+
+#------------------------------------------------------------------------------
+def test_find_many(finder, config_dirs):
+    (config_dirs[1] / 'tools.toml').touch()
+
+    other = chain.config.ConfigFinder('tools.toml')
+    other.append_path('config dir', config_dirs[1], is_dir=True)
+
+    finder.set_file_name('flows.toml')
+
+    assert chain.config.ConfigFinder.find_many([finder, other]) == [
+        None, (config_dirs[1] / 'tools.toml').resolve()]
+
+#------------------------------------------------------------------------------
+def test_find_frozen(finder, config_dirs):
+    (config_dirs[2] / 'tools.toml').touch()
+
+    finder.set_file_name('tools.toml')
+    finder.freeze()
+    assert finder.find() == (config_dirs[2] / 'tools.toml').resolve()
+
+    finder.delete_last_loc()
+    assert finder.find() is None
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('resolve', [False, True])
+def test_find_resolve(tmp_path, config_dirs, resolve):
+    (config_dirs[0] / 'tools.toml').touch()
+    (tmp_path / 'link').symlink_to(config_dirs[0])
+
+    finder = chain.config.ConfigFinder('tools.toml')
+    finder.append_path(
+        'config dir', tmp_path / 'link', is_dir=True, resolve=resolve)
+
+    if resolve:
+        assert finder.find() == (config_dirs[0] / 'tools.toml').resolve()
+    else:
+        assert finder.find() == tmp_path / 'link' / 'tools.toml'
+
+#------------------------------------------------------------------------------
+def test_find_env_var(config_dirs):
+    (config_dirs[1] / 'tools.toml').touch()
+
+    # the passed environment is used instead of os.environ
+    env = {'CHAIN_TEST_CONFIG': str(config_dirs[1])}
+
+    finder = chain.config.ConfigFinder('tools.toml', env=env)
+    finder.append_env_var('CHAIN_TEST_CONFIG', is_dir=True)
+
+    assert finder.find() == config_dirs[1] / 'tools.toml'
+
+#------------------------------------------------------------------------------
+def test_find_not_found(finder):
+    finder.set_file_name('tools.toml')
+    assert finder.find() is None
+
+#------------------------------------------------------------------------------
+def test_find_dir_instead_of_file(finder, config_dirs):
+    (config_dirs[1] / 'tools.toml').mkdir()
+
+    finder.set_file_name('tools.toml')
+
+    with pytest.raises(chain.errors.ConfigFinderError) as einfo:
+        finder.find()
+
+    err = einfo.value.__cause__
+    assert err.kind == chain.errors.PathError.Kind.NOT_FILE
+
+#------------------------------------------------------------------------------
+def test_find_in_unlistable_dir(finder, config_dirs, monkeypatch):
+    (config_dirs[1] / 'tools.toml').touch()
+
+    # e.g. an execute-only directory
+    def scandir(path):
+        raise PermissionError(path)
+
+    monkeypatch.setattr(os, 'scandir', scandir)
+
+    finder.set_file_name('tools.toml')
+    assert finder.find() == config_dirs[1] / 'tools.toml'
+
+#------------------------------------------------------------------------------
+def test_find_special_file(finder, config_dirs):
+    os.mkfifo(config_dirs[1] / 'tools.toml')
+
+    finder.set_file_name('tools.toml')
+    assert finder.find() == config_dirs[1] / 'tools.toml'
+
+#------------------------------------------------------------------------------
+def test_find_looping_link(finder, config_dirs):
+    os.symlink('tools.toml', config_dirs[1] / 'tools.toml')
+
+    finder.set_file_name('tools.toml')
+    assert finder.find() is None
+
+#------------------------------------------------------------------------------
+def test_find_looping_location(tmp_path):
+    os.symlink('loop', tmp_path / 'loop')
+
+    finder = chain.config.ConfigFinder('tools.toml')
+    finder.append_path('config dir', tmp_path / 'loop', is_dir=True)
+
+    with pytest.raises(chain.errors.ConfigFinderError) as einfo:
+        finder.find()
+
+    err = einfo.value.__cause__
+    assert err.kind == chain.errors.PathError.Kind.NOT_EXIST
+
+
+#******************************************************************************
+# Fixtures
+#
+
+#------------------------------------------------------------------------------
+@pytest.fixture
+def config_dirs(tmp_path):
+    dirs = [tmp_path / f'config_{n}' for n in range(3)]
+
+    for path in dirs:
+        path.mkdir()
+
+    return dirs
+
+#------------------------------------------------------------------------------
+@pytest.fixture
+def finder(config_dirs):
+    finder = chain.config.ConfigFinder()
+
+    for n, path in enumerate(config_dirs):
+        finder.append_path(f'config dir {n}', path, is_dir=True)
+
+    return finder
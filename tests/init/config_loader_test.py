@@ -0,0 +1,58 @@
+#******************************************************************************
+#
+#  Project: Build system for FPGA/ASIC
+#
+#  Description: Tests for loading of configuration files
+#
+#  Copyright (c) 2024 Anton Polstyankin <mail@pavhw.org>
+#
+#******************************************************************************
+
+import pytest
+
+import chain.config
+
+
+#******************************************************************************
+# Tests
+#
+
+#------------------------------------------------------------------------------
+def test_load_returns_copy(config_file):
+    data = chain.config.ConfigLoader(config_file).load()
+    data['tool']['questa']['path'] = 'changed'
+
+    data = chain.config.ConfigLoader(config_file).load()
+    assert data['tool']['questa']['path'] == 'scons_questa_tool'
+
+#------------------------------------------------------------------------------
+def test_load_changed_file(config_file):
+    data = chain.config.ConfigLoader(config_file).load()
+    assert data['tool']['questa']['path'] == 'scons_questa_tool'
+
+    config_file.write_text('[tool.vivado]\npath = "scons_vivado_tool"\n')
+
+    data = chain.config.ConfigLoader(config_file).load()
+    assert list(data['tool']) == ['vivado']
+
+#------------------------------------------------------------------------------
+def test_load_not_existing_file(tmp_path):
+    err = chain.errors.ConfigLoaderError
+
+    with pytest.raises(err) as einfo:
+        chain.config.ConfigLoader(tmp_path / 'tools.toml').load()
+
+    assert einfo.value.kind == err.Kind.OPEN
+
+
+#******************************************************************************
+# Fixtures
+#
+
+#------------------------------------------------------------------------------
+@pytest.fixture
+def config_file(tmp_path):
+    file = tmp_path / 'tools.toml'
+    file.write_text('[tool.questa]\npath = "scons_questa_tool"\n')
+
+    return file
@@ -15,6 +15,8 @@ import importlib
 
 import pytest
 
+import chain
+
 
 #******************************************************************************
 # Tests
@@ -22,8 +24,6 @@ import pytest
 
 #------------------------------------------------------------------------------
 def test_no_config(run_chain, cwd, tmp_config_home):
-    import chain
-
     link_config_file('theme.toml', cwd, tmp_config_home)
 
     args = ['myflow']
@@ -163,4 +163,4 @@ def tmp_config_home(tmp_path):
 def link_config_file(file_name, cwd, config_home):
     file = cwd / 'config' / file_name
     link = config_home / file_name
-    link.symlink_to(file, target_is_directory=False)
+    os.symlink(file, link)
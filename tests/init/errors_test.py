@@ -0,0 +1,44 @@
+#******************************************************************************
+#
+#  Project: Build system for FPGA/ASIC
+#
+#  Description: Tests for exception classes
+#
+#  Copyright (c) 2024 Anton Polstyankin <mail@pavhw.org>
+#
+#******************************************************************************
+
+import copy
+import pickle
+
+import pytest
+
+from chain.errors import (
+    PathError, ConfigError, ConfigLoaderError, ConfigFinderError,
+    BuildEnvError)
+
+
+#******************************************************************************
+# Tests
+#
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('error', [
+    PathError('/some/path', PathError.Kind.NOT_EXIST),
+    ConfigError(
+        ConfigError.Kind.NO_CONFIG_PARAM, param='path', entry='flow.x'),
+    ConfigLoaderError(ConfigLoaderError.Kind.OPEN, path='/tools.toml'),
+    ConfigFinderError('searched location'),
+    BuildEnvError(
+        BuildEnvError.Kind.TOOL_VERSION, tool='questa', version=['2021']),
+])
+@pytest.mark.parametrize('clone', [
+    lambda e: pickle.loads(pickle.dumps(e)),
+    copy.copy,
+])
+def test_clone(error, clone):
+    cloned = clone(error)
+
+    assert type(cloned) is type(error)
+    assert vars(cloned) == vars(error)
+    assert str(cloned) == str(error)
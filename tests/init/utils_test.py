@@ -0,0 +1,137 @@
+#******************************************************************************
+#
+#  Project: Build system for FPGA/ASIC
+#
+#  Description: Tests for utilities
+#
+#  Copyright (c) 2024 Anton Polstyankin <mail@pavhw.org>
+#
+#******************************************************************************
+
+import os
+from pathlib import Path
+
+import pytest
+
+import chain.errors
+from chain import utils
+
+
+#******************************************************************************
+# Tests
+#
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('kwargs, kind', [
+    (dict(), None),
+    (dict(is_file=True, is_dir=False), 'NOT_FILE'),
+    (dict(is_file=False, is_dir=True), None),
+    (dict(is_file=False, is_dir=False), None),
+])
+def test_check_dir(tmp_path, kwargs, kind):
+    check_path_kind(tmp_path, kwargs, kind)
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('kwargs, kind', [
+    (dict(), None),
+    (dict(is_file=True, is_dir=False), None),
+    (dict(is_file=False, is_dir=True), 'NOT_DIR'),
+])
+def test_check_file(tmp_path, kwargs, kind):
+    file = tmp_path / 'file'
+    file.touch()
+
+    check_path_kind(file, kwargs, kind)
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('kwargs, kind', [
+    (dict(), 'NOT_EXIST'),
+    (dict(is_file=True, is_dir=False), 'NOT_EXIST'),
+    (dict(is_file=False, is_dir=False), None),
+])
+def test_check_not_existing(tmp_path, kwargs, kind):
+    check_path_kind(tmp_path / 'none', kwargs, kind)
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('kwargs', [
+    dict(), dict(is_file=True, is_dir=False), dict(is_file=False, is_dir=True),
+])
+def test_check_looping_link(tmp_path, kwargs):
+    os.symlink('loop', tmp_path / 'loop')
+    check_path_kind(tmp_path / 'loop', kwargs, 'NOT_EXIST')
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('check', ['check_file', 'check_dir'])
+def test_specialized_check_looping_link(tmp_path, check):
+    os.symlink('loop', tmp_path / 'loop')
+
+    with pytest.raises(chain.errors.PathError) as einfo:
+        getattr(utils, check)(tmp_path / 'loop')
+
+    assert einfo.value.kind == chain.errors.PathError.Kind.NOT_EXIST
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('path', [Path('relative'), 'relative'])
+def test_check_not_absolute(path):
+    check_path_kind(path, dict(is_abs=True), 'NOT_ABS')
+
+#------------------------------------------------------------------------------
+def test_require_abs(tmp_path):
+    utils.require_abs(tmp_path / 'none')
+
+    with pytest.raises(chain.errors.PathError) as einfo:
+        utils.require_abs(Path('relative'))
+
+    assert einfo.value.kind == chain.errors.PathError.Kind.NOT_ABS
+
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('check, name, kind', [
+    ('check_file', 'file', None),
+    ('check_file', 'dir', 'NOT_FILE'),
+    ('check_file', 'none', 'NOT_EXIST'),
+    ('check_abs_file', 'file', None),
+    ('check_dir', 'dir', None),
+    ('check_dir', 'file', 'NOT_DIR'),
+])
+def test_specialized_checks(tmp_path, check, name, kind):
+    (tmp_path / 'file').touch()
+    (tmp_path / 'dir').mkdir()
+
+    check = getattr(utils, check)
+
+    if kind is None:
+        check(tmp_path / name)
+        return
+
+    with pytest.raises(chain.errors.PathError) as einfo:
+        check(tmp_path / name)
+
+    assert einfo.value.kind == chain.errors.PathError.Kind[kind]
+
+#------------------------------------------------------------------------------
+def test_check_abs_file_relative():
+    with pytest.raises(chain.errors.PathError) as einfo:
+        utils.check_abs_file(Path('relative'))
+
+    assert einfo.value.kind == chain.errors.PathError.Kind.NOT_ABS
+
+#------------------------------------------------------------------------------
+def test_normalize_path(tmp_path):
+    assert utils.normalize_path(tmp_path, '/abs/path') == Path('/abs/path')
+    assert utils.normalize_path(tmp_path, 'a/../b') == tmp_path / 'b'
+
+
+#******************************************************************************
+# Functions
+#
+
+#------------------------------------------------------------------------------
+def check_path_kind(path, kwargs, kind):
+    if kind is None:
+        utils.check_path(path, **kwargs)
+        return
+
+    with pytest.raises(chain.errors.PathError) as einfo:
+        utils.check_path(path, **kwargs)
+
+    assert einfo.value.kind == chain.errors.PathError.Kind[kind]